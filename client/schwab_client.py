@@ -1,36 +1,114 @@
-from dotenv import load_dotenv, set_key
+from dotenv import dotenv_values
+from dotenv.parser import parse_stream
 from pathlib import Path
 import os
 import base64
+import functools
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+
+
+# Refresh the access token this many seconds before it actually expires
+TOKEN_REFRESH_MARGIN = 180
+
+# After a failed refresh, wait this many seconds before trying again
+TOKEN_REFRESH_RETRY_BACKOFF = 30
+
+# Seconds to wait on the token endpoint (per request, and for a blocking refresh)
+TOKEN_REQUEST_TIMEOUT = 30
+
+DEFAULT_ENV_PATH = Path(__file__).resolve().parent / ".env"
+
+# Parsed .env contents, keyed by path (filled by _load_env_once)
+_ENV_CACHE = {}
+
+
+def _load_env_once(env_path):
+    """Parse the .env file once per process.
+
+    Real environment variables take precedence, matching load_dotenv().
+    """
+    if env_path not in _ENV_CACHE:
+        values = dotenv_values(env_path) if env_path.exists() else {}
+        _ENV_CACHE[env_path] = {**values, **os.environ}
+    return _ENV_CACHE[env_path]
 
 
 class SchwabClient:
-    def __init__(self):
+    # One shared client (and token state) per .env file
+    _instances = {}
+
+    def __new__(cls, env_path=None):
+        env_path = Path(env_path).resolve() if env_path else DEFAULT_ENV_PATH
+        if env_path not in cls._instances:
+            cls._instances[env_path] = super().__new__(cls)
+        return cls._instances[env_path]
+
+    def __init__(self, env_path=None):
+        # Already set up by an earlier SchwabClient() call
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+
         # Define .env path
-        self.env_path = Path(__file__).resolve().parent / ".env"
+        self.env_path = Path(env_path).resolve() if env_path else DEFAULT_ENV_PATH
 
         # Load environment (if file exists)
-        if self.env_path.exists():
-            load_dotenv(dotenv_path=self.env_path)
+        env = _load_env_once(self.env_path)
 
         # Load core configuration (these exist always)
-        self.client_id = os.getenv("APP_KEY")
-        self.client_secret = os.getenv("APP_SECRET")
-        self.redirect_uri = os.getenv("APP_CALLBACK_URL")
-        self.base_url = os.getenv("BASE_URL")
+        self.client_id = env.get("APP_KEY")
+        self.client_secret = env.get("APP_SECRET")
+        self.redirect_uri = env.get("APP_CALLBACK_URL")
+        self.base_url = env.get("BASE_URL")
 
-        # Token endpoint
+        # API endpoints
         self.token_endpoint = f"{self.base_url}/v1/oauth/token"
+        self.accounts_endpoint = f"{self.base_url}/trader/v1/accounts/accountNumbers"
+        self.accounts_full_endpoint = f"{self.base_url}/trader/v1/accounts"
+        self.orders_endpoint_tmpl = f"{self.base_url}/trader/v1/accounts/{{account_id}}/orders"
+
+        # Basic auth header for the token endpoint (None if credentials are missing)
+        self._basic_auth_header = None
+        if self.client_id and self.client_secret:
+            credentials = f"{self.client_id}:{self.client_secret}"
+            self._basic_auth_header = "Basic " + base64.b64encode(credentials.encode()).decode()
 
         # Tokens (may be None initially)
-        self.auth_code_url = os.getenv("AUTH_CODE_URL")
-        self.auth_code = os.getenv("AUTH_CODE")
-        self.access_token = os.getenv("ACCESS_TOKEN")
-        self.refresh_token = os.getenv("REFRESH_TOKEN")
-        self.id_token = os.getenv("ID_TOKEN")
+        self.auth_code_url = env.get("AUTH_CODE_URL")
+        self.auth_code = env.get("AUTH_CODE")
+        self.access_token = env.get("ACCESS_TOKEN")
+        self.refresh_token = env.get("REFRESH_TOKEN")
+        self.id_token = env.get("ID_TOKEN")
+
+        # Shared HTTP session: keep-alive, connection pooling and retries
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                raise_on_status=False  # Hand the last response back so raise_for_status() still applies
+            )
+        ))
+
+        # Token expiry (epoch seconds); None until a token response tells us
+        self._expiry_ts = None
+        self._refresh_lock = threading.Lock()
+        self._refresh_future = None
+        self._refresh_failed_at = None
+        self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="schwab-token")
 
     # -----------------------------------------------------
     # 👇 Entry point for authentication handling
@@ -42,7 +120,62 @@ class SchwabClient:
         if file_age > expiry_days or authenticate:
             self._authorize_and_get_tokens()
 
-        self._refresh_access_token()
+        self._schedule_refresh().result()
+
+    # -----------------------------------------------------
+    # 👇 Background refresh (FRESH / STALE / EXPIRED)
+    # -----------------------------------------------------
+    def _schedule_refresh(self):
+        """Start a background token refresh unless one is already running.
+
+        Returns:
+            Future: Resolves to the result of _refresh_access_token()
+        """
+        with self._refresh_lock:
+            if self._refresh_future is None or self._refresh_future.done():
+                self._refresh_future = self._refresh_executor.submit(self._run_refresh)
+            return self._refresh_future
+
+    def _run_refresh(self):
+        """Refresh the tokens and remember when an attempt failed (for backoff)."""
+        refreshed = self._refresh_access_token()
+        self._refresh_failed_at = None if refreshed else time.time()
+        return refreshed
+
+    def _ensure_fresh_token(self):
+        """Refresh in the background when STALE, block only when EXPIRED.
+
+        A failed refresh is not retried for TOKEN_REFRESH_RETRY_BACKOFF
+        seconds, so a bad refresh token doesn't flood the token endpoint.
+
+        Raises:
+            ValueError: If the token has expired and could not be refreshed
+                within TOKEN_REQUEST_TIMEOUT seconds
+        """
+        if self._expiry_ts is None:
+            return  # Expiry unknown (token loaded from .env), use as-is
+
+        now = time.time()
+        if now <= self._expiry_ts - TOKEN_REFRESH_MARGIN:
+            return  # FRESH
+
+        failed_at = self._refresh_failed_at
+        backing_off = failed_at is not None and now - failed_at < TOKEN_REFRESH_RETRY_BACKOFF
+
+        if now > self._expiry_ts:
+            # EXPIRED: wait (bounded) for a refresh, unless one just failed
+            try:
+                refreshed = not backing_off and self._schedule_refresh().result(timeout=TOKEN_REQUEST_TIMEOUT)
+            except FutureTimeoutError:
+                refreshed = False
+            if not refreshed:
+                raise ValueError(
+                    "Access token expired and could not be refreshed. "
+                    "Run handle_authentication(authenticate=True)."
+                )
+        elif not backing_off:
+            # STALE: refresh in the background, keep using the current token
+            self._schedule_refresh()
 
     # -----------------------------------------------------
     # 👇 Refresh access token (Step 4)
@@ -50,11 +183,8 @@ class SchwabClient:
     def _refresh_access_token(self):
         """Use the stored refresh token to get new access + refresh tokens."""
         try:
-            credentials = f"{self.client_id}:{self.client_secret}"
-            b64_credentials = base64.b64encode(credentials.encode()).decode()
-
             headers = {
-                "Authorization": f"Basic {b64_credentials}",
+                "Authorization": self._basic_auth_header,
                 "Content-Type": "application/x-www-form-urlencoded"
             }
             data = {
@@ -62,7 +192,7 @@ class SchwabClient:
                 "refresh_token": self.refresh_token
             }
 
-            response = requests.post(self.token_endpoint, headers=headers, data=data)
+            response = self.session.post(self.token_endpoint, headers=headers, data=data, timeout=TOKEN_REQUEST_TIMEOUT)
             token_data = response.json()
 
             # Handle invalid or expired refresh token
@@ -73,14 +203,17 @@ class SchwabClient:
             print("✅ Refreshed token successfully")#, token_data)
 
             # Save updated tokens
-            set_key(self.env_path, "REFRESH_TOKEN", token_data.get("refresh_token", ""))
-            set_key(self.env_path, "ACCESS_TOKEN", token_data.get("access_token", ""))
-            set_key(self.env_path, "ID_TOKEN", token_data.get("id_token", ""))
+            self._write_env_batch({
+                "REFRESH_TOKEN": token_data.get("refresh_token", ""),
+                "ACCESS_TOKEN": token_data.get("access_token", ""),
+                "ID_TOKEN": token_data.get("id_token", "")
+            })
 
             # Update class properties
             self.access_token = token_data.get("access_token")
             self.refresh_token = token_data.get("refresh_token")
             self.id_token = token_data.get("id_token")
+            self._expiry_ts = time.time() + int(token_data.get("expires_in", 1800))
 
             print("💾 New tokens saved to .env.")
             return True
@@ -89,6 +222,58 @@ class SchwabClient:
             print(f"❌ Error refreshing token: {e}")
             return False
 
+    # -----------------------------------------------------
+    # 👇 Utility: write several .env keys at once
+    # -----------------------------------------------------
+    def _write_env_batch(self, updates):
+        """Apply all key updates to .env in a single atomic rewrite.
+
+        Untouched lines (including comments) are kept as they are; every
+        line for an updated key is rewritten and keys not yet present are
+        appended. The new content goes to a temp file in the same directory
+        which then replaces .env, keeping its permissions (a new .env is
+        created owner-only, 0600).
+        """
+        try:
+            with open(self.env_path) as env_file:
+                mode = stat.S_IMODE(os.fstat(env_file.fileno()).st_mode)
+                bindings = list(parse_stream(env_file))
+        except FileNotFoundError:
+            mode = None
+            bindings = []
+
+        def serialize(key, value):
+            value = value.replace("\\", "\\\\").replace('"', '\\"')
+            return f'{key}="{value}"\n'
+
+        # Rewrite every line for an updated key (dotenv keeps the last duplicate)
+        seen = set()
+        lines = []
+        for binding in bindings:
+            if binding.key in updates:
+                lines.append(serialize(binding.key, updates[binding.key]))
+                seen.add(binding.key)
+            else:
+                lines.append(binding.original.string)
+
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        lines.extend(serialize(key, value) for key, value in updates.items() if key not in seen)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.env_path.parent, prefix=".env.")
+        try:
+            try:
+                os.write(fd, "".join(lines).encode())
+            finally:
+                os.close(fd)
+            if mode is not None:
+                os.chmod(tmp_path, mode)  # mkstemp creates the file as 0600
+            os.replace(tmp_path, self.env_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
     # -----------------------------------------------------
     # 👇 Utility: check file age
     # -----------------------------------------------------
@@ -113,18 +298,15 @@ class SchwabClient:
 
     def _extract_auth_code(self, auth_code_url):
         """Extract 'code' value from redirect URL."""
-        return auth_code_url.split("code=")[1].split("&")[0].replace("%40", "@")
+        return parse_qs(urlparse(auth_code_url).query).get("code", [""])[0]
 
     def _authorize_and_get_tokens(self):
         """Request new tokens and save to .env."""
         auth_code_url = self._get_auth_code_url()
         auth_code = self._extract_auth_code(auth_code_url)
 
-        credentials = f"{self.client_id}:{self.client_secret}"
-        b64_credentials = base64.b64encode(credentials.encode()).decode()
-
         headers = {
-            "Authorization": f"Basic {b64_credentials}",
+            "Authorization": self._basic_auth_header,
             "Content-Type": "application/x-www-form-urlencoded"
         }
         data = {
@@ -134,33 +316,52 @@ class SchwabClient:
         }
 
         print("\n📡 Requesting tokens from Schwab API...")
-        response = requests.post(self.token_endpoint, headers=headers, data=data)
+        response = self.session.post(self.token_endpoint, headers=headers, data=data, timeout=TOKEN_REQUEST_TIMEOUT)
         token_data = response.json()
         print("✅ Token response received")#, token_data)
 
-        # Ensure .env exists
-        self.env_path.touch(exist_ok=True)
-
         # Save new tokens
-        set_key(self.env_path, "AUTH_CODE_URL", auth_code_url)
-        set_key(self.env_path, "AUTH_CODE", auth_code)
-        set_key(self.env_path, "REFRESH_TOKEN", token_data.get("refresh_token", ""))
-        set_key(self.env_path, "ACCESS_TOKEN", token_data.get("access_token", ""))
-        set_key(self.env_path, "ID_TOKEN", token_data.get("id_token", ""))
+        self._write_env_batch({
+            "AUTH_CODE_URL": auth_code_url,
+            "AUTH_CODE": auth_code,
+            "REFRESH_TOKEN": token_data.get("refresh_token", ""),
+            "ACCESS_TOKEN": token_data.get("access_token", ""),
+            "ID_TOKEN": token_data.get("id_token", "")
+        })
 
         self.auth_code_url = auth_code_url
         self.auth_code = auth_code
-        self.access_token = token_data.get("refresh_token", "")
-        self.refresh_token = token_data.get("access_token", "")
+        self.access_token = token_data.get("access_token", "")
+        self.refresh_token = token_data.get("refresh_token", "")
         self.id_token = token_data.get("id_token", "")
+        self._expiry_ts = time.time() + int(token_data.get("expires_in", 1800))
 
         print("💾 Tokens saved to .env successfully.")
 
     def get_headers(self):
-        """Return headers with Authorization: Bearer {access_token}"""
+        """Return headers with Authorization: Bearer {access_token}.
+
+        Kicks off a background refresh when the token is close to expiry and
+        only blocks once it has actually expired. Returns a new dict on every
+        call, so callers may add their own headers.
+        """
         if not self.access_token:
             raise ValueError("Access token not found. Run handle_authentication() first.")
+
+        self._ensure_fresh_token()
+
+        return self._build_headers(self.access_token)
+
+    @staticmethod
+    def _build_headers(access_token):
+        """Build the API request headers for the given access token."""
         return {
-            "Authorization": f"Bearer {self.access_token}",
+            "Authorization": f"Bearer {access_token}",
             "Accept": "application/json"
         }
+
+
+@functools.lru_cache(maxsize=1)
+def get_client():
+    """Return the process-wide SchwabClient (shared session, tokens and .env cache)."""
+    return SchwabClient()
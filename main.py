@@ -3,7 +3,7 @@ Example usage of the Orders module
 Demonstrates how to retrieve and display orders from Schwab accounts
 """
 
-from client.schwab_client import SchwabClient
+from client.schwab_client import get_client
 from src.functions.accounting import Accounting
 from src.functions.orders import Orders
 import json
@@ -12,9 +12,9 @@ import json
 def main():
 
     # Initialize and authenticate
-    client = SchwabClient()
-    accounting = Accounting()
-    orders = Orders()
+    client = get_client()
+    accounting = Accounting(client)
+    orders = Orders(client)
 
     client.handle_authentication(authenticate=False)
 
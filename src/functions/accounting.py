@@ -2,37 +2,46 @@
 Accounting Module - Retrieve Schwab account information
 """
 
-from tabulate import tabulate
-import pandas as pd
+import hashlib
 import json
-from datetime import datetime, timedelta, timezone
-import requests
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Optional
 
-from client.schwab_client import SchwabClient
+from client.schwab_client import SchwabClient, get_client
 
 
+# On-disk cache for /accounts/accountNumbers (near-static, revalidated via ETag)
+ACCOUNTS_CACHE_DIR = Path.home() / ".schwab_cache"
+ACCOUNTS_CACHE_TTL = 24 * 60 * 60  # seconds
+
 class Accounting:
-    def __init__(self):
-        self.client = SchwabClient()
+    def __init__(self, client: Optional[SchwabClient] = None):
+        self.client = client or get_client()
+        self._account_map = None  # Filled lazily by _get_account_map()
+        self._account_map_path = None  # Cache file (identity) the map was built for
 
-    def get_account_numbers(self):
+    def get_account_numbers(self, verbose: bool = False):
         """
         Get account numbers and their encrypted hash values.
 
+        Args:
+            verbose (bool): Print the full JSON response (default: False)
+
         Returns:
             list: List of plain account numbers (for display purposes)
 
-        Note: This method prints the full response which includes both
-        accountNumber and hashValue. Use get_account_info() to get
-        the structured data with hash values.
+        Note: With verbose=True this method prints the full response which
+        includes both accountNumber and hashValue. Use get_account_info() to
+        get the structured data with hash values.
         """
-        url = f"{self.client.base_url}/trader/v1/accounts/accountNumbers"
-        headers = self.client.get_headers()
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-
-        data = response.json()
-        print(json.dumps(data, indent=4))  # Visualize full JSON
+        data = self.get_account_info()
+        if verbose:
+            sys.stdout.write(json.dumps(data, indent=None, separators=(",", ":")) + "\n")  # Visualize full JSON
 
         # Extract all account numbers safely
         account_numbers = [
@@ -61,14 +70,126 @@ class Accounting:
             account_info = accounting.get_account_info()
             encrypted_id = account_info[0]["hashValue"]  # Use this for orders/transactions
             plain_number = account_info[0]["accountNumber"]  # Use this for display
+
+        Note: The response is cached in ~/.schwab_cache/accounts-<app>-<user>.json,
+        keyed on the app (APP_KEY + BASE_URL) and the authorized login (AUTH_CODE),
+        so re-authorizing as another user never sees the previous user's accounts.
+        A cache younger than 24 hours is returned without a request; an older one
+        is revalidated with If-None-Match and reused on 304 Not Modified.
         """
-        url = f"{self.client.base_url}/trader/v1/accounts/accountNumbers"
+        cache = self._read_accounts_cache()
+        if cache and time.time() - cache["ts"] < ACCOUNTS_CACHE_TTL:
+            return cache["body"]
+
+        url = self.client.accounts_endpoint
         headers = self.client.get_headers()
-        response = requests.get(url, headers=headers)
+        if cache and cache.get("etag"):
+            headers = {**headers, "If-None-Match": cache["etag"]}
+
+        response = self.client.session.get(url, headers=headers)
+
+        if cache and response.status_code == 304:
+            self._write_accounts_cache(cache["etag"], cache["body"])
+            return cache["body"]
+
+        response.raise_for_status()
+
+        data = response.json()
+        self._write_accounts_cache(response.headers.get("ETag"), data)
+        return data
+
+    def get_accounts_full(self, positions: bool = False):
+        """
+        Get full account details (balances and, optionally, positions).
+
+        Unlike get_account_info(), which hits /accountNumbers, this calls
+        /trader/v1/accounts and is not cached.
+
+        Args:
+            positions (bool): Include each account's positions (default: False)
+
+        Returns:
+            list: List of account dictionaries as returned by the API, e.g.
+                [{"securitiesAccount": {"accountNumber": "...", "currentBalances": {...}, ...}}]
+        """
+        url = self.client.accounts_full_endpoint
+        headers = self.client.get_headers()
+        params = {"fields": "positions"} if positions else None
+
+        response = self.client.session.get(url, headers=headers, params=params)
         response.raise_for_status()
 
         return response.json()
 
+    @property
+    def _accounts_cache_prefix(self):
+        """File name prefix for this app (APP_KEY + BASE_URL)."""
+        app_key = hashlib.sha256(f"{self.client.client_id}|{self.client.base_url}".encode()).hexdigest()[:16]
+        return f"accounts-{app_key}-"
+
+    @property
+    def _accounts_cache_path(self):
+        """Cache file for this app and authorized login (a new authorization gets a new file)."""
+        user_key = hashlib.sha256(f"{self.client.auth_code}".encode()).hexdigest()[:16]
+        return ACCOUNTS_CACHE_DIR / f"{self._accounts_cache_prefix}{user_key}.json"
+
+    def _read_accounts_cache(self):
+        """Return the cached accounts entry, or None if missing or unreadable."""
+        try:
+            with open(self._accounts_cache_path) as cache_file:
+                cache = json.load(cache_file)
+            return cache if "ts" in cache and "body" in cache else None
+        except (OSError, ValueError):
+            return None
+
+    def _write_accounts_cache(self, etag, body):
+        """Store the accounts response with its ETag (best effort)."""
+        tmp_path = None
+        try:
+            cache_path = self._accounts_cache_path
+            cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, prefix=".accounts.")
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump({"etag": etag, "body": body, "ts": time.time()}, cache_file)
+            os.replace(tmp_path, cache_path)
+            tmp_path = None
+
+            # Drop entries left over from earlier authorizations of this app
+            for old_path in cache_path.parent.glob(f"{self._accounts_cache_prefix}*.json"):
+                if old_path != cache_path:
+                    old_path.unlink(missing_ok=True)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️  Could not write accounts cache: {e}")
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _get_account_map(self):
+        """
+        Fetch accounts once and map plain account numbers to encrypted IDs.
+
+        Returns:
+            Mapping[str, str]: Read-only {accountNumber: hashValue} mapping,
+                cached on this instance until invalidate_accounts() is called
+                or the client is re-authorized
+        """
+        cache_path = self._accounts_cache_path
+        if self._account_map is None or self._account_map_path != cache_path:
+            self._account_map = MappingProxyType({
+                acc["accountNumber"]: acc["hashValue"]
+                for acc in self.get_account_info()
+            })
+            self._account_map_path = cache_path
+        return self._account_map
+
+    def invalidate_accounts(self):
+        """Drop the cached account data (memory and disk) so the next lookup re-fetches it."""
+        self._account_map = None
+        try:
+            self._accounts_cache_path.unlink()
+        except FileNotFoundError:
+            pass
+
     def get_encrypted_account_id(self, account_number=None):
         """
         Get the encrypted account ID (hashValue) for a specific account.
@@ -83,20 +204,19 @@ class Accounting:
         Raises:
             ValueError: If account_number is provided but not found
         """
-        account_info = self.get_account_info()
+        account_map = self._get_account_map()
 
         if account_number is None:
             # Return first account's hash
-            if account_info:
-                return account_info[0]["hashValue"]
+            if account_map:
+                return next(iter(account_map.values()))
             raise ValueError("No accounts found")
 
         # Find specific account
-        for acc in account_info:
-            if acc["accountNumber"] == str(account_number):
-                return acc["hashValue"]
-
-        raise ValueError(f"Account number {account_number} not found")
+        try:
+            return account_map[str(account_number)]
+        except KeyError:
+            raise ValueError(f"Account number {account_number} not found") from None
 
     def get_all_encrypted_ids(self):
         """
@@ -109,8 +229,4 @@ class Accounting:
                     "987654321": "XYZ789ABC"
                 }
         """
-        account_info = self.get_account_info()
-        return {
-            acc["accountNumber"]: acc["hashValue"]
-            for acc in account_info
-        }
\ No newline at end of file
+        return dict(self._get_account_map())
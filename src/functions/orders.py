@@ -2,14 +2,63 @@
 Orders Module - Retrieve and manage Schwab account orders
 """
 
+import asyncio
+import itertools
 import requests
-import json
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Union
+import sys
+import ijson
+import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import List, Dict, Optional, Set, Union
 from tabulate import tabulate
 import pandas as pd
 
-from client.schwab_client import SchwabClient
+# Stream-parse orders only with ijson's C backend; the pure-Python
+# backends are slower than response.json()
+try:
+    ijson_c = ijson.get_backend("yajl2_c")
+except ImportError:
+    ijson_c = None
+
+try:
+    import httpx  # Optional: used by get_all_accounts_orders(http2=True)
+except ImportError:
+    httpx = None
+
+from client.schwab_client import SchwabClient, get_client
+
+
+# Order fields shown in the summary table, mapped to their column names
+ORDER_FIELDS = {
+    "orderId": "Order ID",
+    "status": "Status",
+    "orderType": "Type",
+    "price": "Price",
+    "duration": "Duration",
+    "enteredTime": "Entered Time"
+}
+
+# Shared read-only defaults so missing legs/instruments don't allocate per order
+_EMPTY = MappingProxyType({})
+_NO_LEGS = (None,)
+_NO_LEG_ROW = ("N/A", "N/A", 0)
+
+
+def _format_entered_time(entered_time):
+    """Format an ISO-8601 enteredTime as '%Y-%m-%d %H:%M:%S' in its own offset; leave anything else as-is."""
+    if entered_time == "N/A":
+        return entered_time
+    try:
+        return datetime.fromisoformat(entered_time.replace("Z", "+00:00")).strftime("%Y-%m-%d %H:%M:%S")
+    except (AttributeError, TypeError, ValueError):
+        return entered_time
+
+SUMMARY_COLUMNS = [
+    "Order ID", "Status", "Symbol", "Instruction", "Quantity",
+    "Type", "Price", "Duration", "Entered Time"
+]
 
 
 class Orders:
@@ -20,9 +69,51 @@ class Orders:
     not plain account numbers.
     """
 
-    def __init__(self):
-        """Initialize Orders with SchwabClient instance."""
-        self.client = SchwabClient()
+    def __init__(self, client: Optional[SchwabClient] = None):
+        """Initialize Orders with a SchwabClient instance (the shared one by default)."""
+        self.client = client or get_client()
+        self._accounting = None
+
+    @property
+    def accounting(self):
+        """Lazily created Accounting instance, kept so its account lookup cache is reused."""
+        if self._accounting is None:
+            from src.functions.accounting import Accounting
+            self._accounting = Accounting(self.client)
+        return self._accounting
+
+    def _build_orders_params(
+        self,
+        days: int,
+        max_results: int,
+        status: Optional[str]
+    ) -> Dict:
+        """
+        Build the query parameters for the orders endpoint.
+
+        Raises:
+            ValueError: If days > 365 (Schwab API limit)
+        """
+        # Validate days parameter
+        if days > 365:
+            raise ValueError("Days cannot exceed 365 (Schwab API maximum date range is 1 year)")
+
+        # Calculate date range in ISO-8601 format (UTC, so the trailing Z is accurate)
+        to_date = datetime.now(timezone.utc)
+        from_date = to_date - timedelta(days=days)
+
+        # Format dates as required by Schwab API: yyyy-MM-dd'T'HH:mm:ss.SSSZ
+        params = {
+            "fromEnteredTime": from_date.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "toEnteredTime": to_date.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "maxResults": max_results
+        }
+
+        # Add status filter if provided
+        if status:
+            params["status"] = status
+
+        return params
 
     def get_orders_by_days(
         self,
@@ -64,45 +155,15 @@ class Orders:
             # Get orders using encrypted ID
             order_list = orders.get_orders_by_days(encrypted_id, days=30)
         """
-        # Validate days parameter
-        if days > 365:
-            raise ValueError("Days cannot exceed 365 (Schwab API maximum date range is 1 year)")
-
-        # Calculate date range in ISO-8601 format
-        to_date = datetime.now()
-        from_date = to_date - timedelta(days=days)
-
-        # Format dates as required by Schwab API: yyyy-MM-dd'T'HH:mm:ss.SSSZ
-        to_entered_time = to_date.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
-        from_entered_time = from_date.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
-
-        # Build API endpoint - MUST use encrypted account ID
-        url = f"{self.client.base_url}/trader/v1/accounts/{account_id}/orders"
-
-        # Build query parameters
-        params = {
-            "fromEnteredTime": from_entered_time,
-            "toEnteredTime": to_entered_time,
-            "maxResults": max_results
-        }
-
-        # Add status filter if provided
-        if status:
-            params["status"] = status
-
-        # Get headers with access token
-        headers = self.client.get_headers()
+        params = self._build_orders_params(days, max_results, status)
 
         print(f"\n📊 Fetching orders for encrypted account ID: {account_id[:8]}...")
-        print(f"   Date range: {from_date.strftime('%Y-%m-%d')} to {to_date.strftime('%Y-%m-%d')} ({days} days)")
+        print(f"   Date range: {params['fromEnteredTime'][:10]} to {params['toEnteredTime'][:10]} ({days} days)")
         if status:
             print(f"   Status filter: {status}")
 
         try:
-            response = requests.get(url, headers=headers, params=params)
-            response.raise_for_status()
-
-            orders = response.json()
+            orders = self._fetch_orders(account_id, params)
 
             print(f"✅ Retrieved {len(orders)} orders")
 
@@ -115,10 +176,40 @@ class Orders:
                 print("\n⚠️  ERROR: You must use the ENCRYPTED account ID (hashValue), not plain account number!")
                 print("   Fix: Use Accounting.get_encrypted_account_id() to get the correct value.")
             raise
+
         except Exception as e:
             print(f"❌ Error fetching orders: {e}")
             raise
 
+    def _fetch_orders(self, account_id: str, params: Dict) -> List[Dict]:
+        """Request and parse one account's orders without printing (safe to run in worker threads)."""
+        # Build API endpoint - MUST use encrypted account ID
+        url = self.client.orders_endpoint_tmpl.format(account_id=account_id)
+
+        # Get headers with access token
+        headers = self.client.get_headers()
+
+        # Stream-parse the (potentially multi-MB) body instead of buffering it whole,
+        # when the C ijson backend is available
+        with self.client.session.get(url, headers=headers, params=params, stream=True) as response:
+            if not response.ok:
+                _ = response.content  # Read the error body before the connection is released
+            response.raise_for_status()
+
+            if ijson_c is None:
+                return response.json()
+
+            response.raw.decode_content = True  # Undo gzip/deflate transfer encoding
+            events = ijson_c.parse(response.raw, use_float=True)
+
+            # Peek at the first event: stream the items of an array, but build any
+            # other top-level value (e.g. an error object) whole, as response.json() would
+            first = next(events)
+            events = itertools.chain([first], events)
+            if first[1] == "start_array":
+                return list(ijson_c.items(events, "item"))
+            return next(ijson_c.items(events, ""))
+
     def get_orders_by_plain_account(
         self,
         account_number: str,
@@ -141,10 +232,7 @@ class Orders:
         Returns:
             List[Dict]: List of order dictionaries
         """
-        from src.functions.accounting import Accounting
-
-        accounting = Accounting()
-        encrypted_id = accounting.get_encrypted_account_id(account_number)
+        encrypted_id = self.accounting.get_encrypted_account_id(account_number)
 
         return self.get_orders_by_days(
             account_id=encrypted_id,
@@ -157,7 +245,8 @@ class Orders:
         self,
         days: int = 30,
         max_results: int = 3000,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        http2: bool = False
     ) -> Dict[str, List[Dict]]:
         """
         Get orders for all linked accounts.
@@ -166,27 +255,78 @@ class Orders:
             days (int): Number of days back from today
             max_results (int): Maximum number of orders per account
             status (str, optional): Filter by order status
+            http2 (bool): Multiplex all requests over a single HTTP/2 connection
+                with httpx instead of a thread pool (requires ``httpx[http2]``;
+                cannot be called from inside a running event loop)
 
         Returns:
             Dict[str, List[Dict]]: Dictionary mapping plain account numbers to their orders
         """
-        from src.functions.accounting import Accounting
+        account_mapping = self.accounting.get_all_encrypted_ids()
 
-        accounting = Accounting()
-        account_mapping = accounting.get_all_encrypted_ids()
+        if not account_mapping:
+            return {}
 
-        all_orders = {}
+        if http2 and httpx is None:
+            raise ImportError("http2=True requires httpx: pip install 'httpx[http2]'")
+
+        params = self._build_orders_params(days, max_results, status)
+        print(f"\n🔄 Fetching orders for {len(account_mapping)} accounts...")
+
+        if http2:
+            return asyncio.run(self._get_all_accounts_orders_http2(account_mapping, params))
+
+        # Keep results in account order regardless of which request finishes first
+        all_orders = {plain_number: [] for plain_number in account_mapping}
+
+        # Requests are I/O-bound, so fetch all accounts concurrently over the pooled session.
+        # Workers stay quiet; all output comes from this thread as results arrive.
+        with ThreadPoolExecutor(max_workers=min(8, len(account_mapping))) as executor:
+            futures = {
+                executor.submit(self._fetch_orders, encrypted_id, params): plain_number
+                for plain_number, encrypted_id in account_mapping.items()
+            }
+
+            for future in as_completed(futures):
+                plain_number = futures[future]
+                try:
+                    all_orders[plain_number] = future.result()
+                    print(f"✅ Retrieved {len(all_orders[plain_number])} orders for account {plain_number}")
+                except Exception as e:
+                    print(f"⚠️  Failed to retrieve orders for account {plain_number}: {e}")
+
+        return all_orders
+
+    async def _get_all_accounts_orders_http2(
+        self,
+        account_mapping: Dict[str, str],
+        params: Dict
+    ) -> Dict[str, List[Dict]]:
+        """Fetch every account's orders concurrently as streams on one HTTP/2 connection."""
+        headers = self.client.get_headers()
+        orders_endpoint_tmpl = self.client.orders_endpoint_tmpl
+
+        async with httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+            timeout=30.0
+        ) as http:
+            responses = await asyncio.gather(
+                *[
+                    http.get(orders_endpoint_tmpl.format(account_id=encrypted_id), headers=headers, params=params)
+                    for encrypted_id in account_mapping.values()
+                ],
+                return_exceptions=True
+            )
 
-        for plain_number, encrypted_id in account_mapping.items():
+        all_orders = {}
+        for plain_number, response in zip(account_mapping, responses):
             try:
-                print(f"\n🔄 Fetching orders for account {plain_number}...")
-                orders = self.get_orders_by_days(
-                    account_id=encrypted_id,
-                    days=days,
-                    max_results=max_results,
-                    status=status
-                )
-                all_orders[plain_number] = orders
+                if isinstance(response, Exception):
+                    raise response
+                response.raise_for_status()
+                all_orders[plain_number] = response.json()
+                print(f"✅ Retrieved {len(all_orders[plain_number])} orders for account {plain_number}")
             except Exception as e:
                 print(f"⚠️  Failed to retrieve orders for account {plain_number}: {e}")
                 all_orders[plain_number] = []
@@ -201,64 +341,49 @@ class Orders:
             orders (List[Dict]): List of order dictionaries
 
         Returns:
-            pd.DataFrame: Formatted summary of orders
+            pd.DataFrame: Formatted summary of orders. "Entered Time" is shown
+                as local wall-clock time in each order's own UTC offset.
         """
         if not orders:
             return pd.DataFrame()
 
-        summary_data = []
+        # Order leg information (symbol, instruction, quantity) from the first leg,
+        # with the same defaults as a missing leg
+        first_legs = ((order.get("orderLegCollection") or _NO_LEGS)[0] for order in orders)
+        symbols, instructions, quantities = zip(*[
+            _NO_LEG_ROW if leg is None else (
+                leg.get("instrument", _EMPTY).get("symbol", "N/A"),
+                leg.get("instruction", "N/A"),
+                leg.get("quantity", 0)
+            )
+            for leg in first_legs
+        ])
+
+        # Parse entered time for better readability, keeping each order's own UTC offset
+        entered_times = [_format_entered_time(order.get("enteredTime", "N/A")) for order in orders]
+
+        # Top-level order fields, one column at a time with the "N/A" default
+        columns = {
+            column: [order.get(field, "N/A") for order in orders]
+            for field, column in ORDER_FIELDS.items()
+        }
+        columns.update({
+            "Symbol": symbols,
+            "Instruction": instructions,
+            "Quantity": quantities,
+            "Entered Time": entered_times
+        })
 
-        for order in orders:
-            # Extract key order information
-            order_id = order.get("orderId", "N/A")
-            status = order.get("status", "N/A")
-            entered_time = order.get("enteredTime", "N/A")
+        return pd.DataFrame({column: list(columns[column]) for column in SUMMARY_COLUMNS})
 
-            # Parse entered time for better readability
-            if entered_time != "N/A":
-                try:
-                    dt = datetime.fromisoformat(entered_time.replace("Z", "+00:00"))
-                    entered_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    pass
-
-            # Extract order leg information (symbol, quantity, instruction)
-            order_legs = order.get("orderLegCollection", [])
-            if order_legs:
-                leg = order_legs[0]  # First leg
-                symbol = leg.get("instrument", {}).get("symbol", "N/A")
-                quantity = leg.get("quantity", 0)
-                instruction = leg.get("instruction", "N/A")
-            else:
-                symbol = "N/A"
-                quantity = 0
-                instruction = "N/A"
-
-            order_type = order.get("orderType", "N/A")
-            duration = order.get("duration", "N/A")
-            price = order.get("price", "N/A")
-
-            summary_data.append({
-                "Order ID": order_id,
-                "Status": status,
-                "Symbol": symbol,
-                "Instruction": instruction,
-                "Quantity": quantity,
-                "Type": order_type,
-                "Price": price,
-                "Duration": duration,
-                "Entered Time": entered_time
-            })
-
-        df = pd.DataFrame(summary_data)
-        return df
-
-    def print_orders_table(self, orders: List[Dict]) -> None:
+    def print_orders_table(self, orders: List[Dict], tablefmt: Optional[str] = None) -> None:
         """
-        Print orders in a formatted table using tabulate.
+        Print orders in a formatted table.
 
         Args:
             orders (List[Dict]): List of order dictionaries
+            tablefmt (str, optional): tabulate format (e.g. 'grid'). By default
+                the table is rendered with pandas' DataFrame.to_string()
         """
         df = self.format_orders_summary(orders)
 
@@ -266,11 +391,15 @@ class Orders:
             print("\n📭 No orders found.")
             return
 
-        print("\n" + "="*120)
-        print("ORDERS SUMMARY")
-        print("="*120)
-        print(tabulate(df, headers='keys', tablefmt='grid', showindex=False))
-        print("="*120 + "\n")
+        if tablefmt:
+            table = tabulate(df, headers='keys', tablefmt=tablefmt, showindex=False)
+        else:
+            table = df.to_string(index=False)
+
+        # Build the whole block first so it goes out in a single write
+        rule = "=" * 120
+        sys.stdout.write(f"\n{rule}\nORDERS SUMMARY\n{rule}\n{table}\n{rule}\n\n")
+        sys.stdout.flush()
 
     def get_orders_json(
         self,
@@ -284,7 +413,7 @@ class Orders:
         Args:
             account_id (str): The ENCRYPTED account ID (hashValue)
             days (int): Number of days back from today
-            pretty (bool): Whether to format JSON with indentation
+            pretty (bool): Whether to format JSON with (2-space) indentation
 
         Returns:
             str: JSON string of orders
@@ -292,8 +421,8 @@ class Orders:
         orders = self.get_orders_by_days(account_id, days)
 
         if pretty:
-            return json.dumps(orders, indent=4)
-        return json.dumps(orders)
+            return orjson.dumps(orders, option=orjson.OPT_INDENT_2).decode()
+        return orjson.dumps(orders).decode()
 
     def filter_orders_by_symbol(
         self,
@@ -310,17 +439,16 @@ class Orders:
         Returns:
             List[Dict]: Filtered list of orders
         """
-        filtered_orders = []
+        target = symbol.upper()
 
-        for order in orders:
-            order_legs = order.get("orderLegCollection", [])
-            for leg in order_legs:
-                instrument_symbol = leg.get("instrument", {}).get("symbol", "")
-                if instrument_symbol.upper() == symbol.upper():
-                    filtered_orders.append(order)
-                    break  # Only add once per order
-
-        return filtered_orders
+        # any() stops at the first matching leg, so each order is added once
+        return [
+            order for order in orders
+            if any(
+                leg.get("instrument", {}).get("symbol", "").upper() == target
+                for leg in order.get("orderLegCollection", ())
+            )
+        ]
 
     def filter_orders_by_status(
         self,
@@ -334,10 +462,35 @@ class Orders:
             orders (List[Dict]): List of order dictionaries
             status (str): Status to filter by (e.g., 'FILLED', 'WORKING')
 
+        Returns:
+            List[Dict]: Filtered list of orders
+
+        Note: For a single known status, prefer get_orders_by_days(..., status=...)
+        so the API filters server-side and returns less data.
+        """
+        target = status.upper()
+        return [
+            order for order in orders
+            if order.get("status", "").upper() == target
+        ]
+
+    def filter_orders_by_statuses(
+        self,
+        orders: List[Dict],
+        statuses: Set[str]
+    ) -> List[Dict]:
+        """
+        Filter orders matching any of several statuses.
+
+        Args:
+            orders (List[Dict]): List of order dictionaries
+            statuses (Set[str]): Statuses to keep (e.g. {'FILLED', 'WORKING'})
+
         Returns:
             List[Dict]: Filtered list of orders
         """
+        targets = {status.upper() for status in statuses}
         return [
             order for order in orders
-            if order.get("status", "").upper() == status.upper()
+            if order.get("status", "").upper() in targets
         ]
\ No newline at end of file
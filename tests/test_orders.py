@@ -0,0 +1,68 @@
+"""
+Tests for Orders.format_orders_summary
+
+Expected values were produced by the original per-order implementation.
+Run with: python -m unittest discover tests
+"""
+
+import unittest
+import warnings
+
+from src.functions.orders import Orders
+
+
+ORDERS = [
+    {
+        "orderId": 1, "status": "FILLED", "orderType": "LIMIT", "duration": "DAY", "price": 412.5,
+        "enteredTime": "2024-03-01T14:30:15+0000",
+        "orderLegCollection": [{"instrument": {"symbol": "SPY"}, "quantity": 10, "instruction": "BUY"}]
+    },
+    {
+        # OCO / trigger parent: no top-level legs
+        "orderId": 2, "status": "WORKING", "orderType": "TRIGGER", "duration": "GOOD_TILL_CANCEL",
+        "enteredTime": "2024-03-01T15:00:00Z", "childOrderStrategies": []
+    },
+    {
+        # Leg without quantity, missing price/duration, unparseable time
+        "orderId": 3, "status": "CANCELED", "orderType": "MARKET", "enteredTime": "garbage",
+        "orderLegCollection": [{"instrument": {"symbol": "AAPL"}, "instruction": "SELL"}]
+    }
+]
+
+EXPECTED = {
+    "Order ID": [1, 2, 3],
+    "Status": ["FILLED", "WORKING", "CANCELED"],
+    "Symbol": ["SPY", "N/A", "AAPL"],
+    "Instruction": ["BUY", "N/A", "SELL"],
+    "Quantity": [10, 0, 0],
+    "Type": ["LIMIT", "TRIGGER", "MARKET"],
+    "Price": [412.5, "N/A", "N/A"],
+    "Duration": ["DAY", "GOOD_TILL_CANCEL", "N/A"],
+    "Entered Time": ["2024-03-01 14:30:15", "2024-03-01 15:00:00", "garbage"]
+}
+
+
+class FormatOrdersSummaryTest(unittest.TestCase):
+    def setUp(self):
+        self.orders = Orders()
+
+    def test_matches_original_output(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # No pandas FutureWarnings
+            df = self.orders.format_orders_summary(ORDERS)
+
+        self.assertEqual(list(df.columns), list(EXPECTED))
+        self.assertEqual(df.to_dict("list"), EXPECTED)
+
+    def test_quantity_stays_integer_without_legs(self):
+        df = self.orders.format_orders_summary(ORDERS)
+
+        self.assertEqual(str(df["Quantity"].dtype), "int64")
+        self.assertEqual(df["Quantity"].tolist(), [10, 0, 0])
+
+    def test_empty(self):
+        self.assertTrue(self.orders.format_orders_summary([]).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()